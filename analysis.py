@@ -1,37 +1,47 @@
 # ml_pipeline/analysis.py
+import re
+import numpy as np
 import pandas as pd
+from utils import SCRAPED_DATASET, read_scraped, to_numeric_price
 
-def analyze_competitor_prices(csv_path="outputs/scraped_results.csv", output_path="outputs/competitor_analysis.csv"):
-    df = pd.read_csv(csv_path)
-    df["price"] = pd.to_numeric(df["price"].astype(str).str.replace(r"[^\d.]", "", regex=True), errors="coerce")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9 ]")
+_WS_RE = re.compile(r"\s+")
+
+def analyze_competitor_prices(data_path=SCRAPED_DATASET, output_path="outputs/competitor_analysis.csv"):
+    df = read_scraped(data_path, columns=["title", "platform", "price"])
+    df["price"] = to_numeric_price(df["price"])
+    df["platform"] = df["platform"].astype("category")
     df["normalized_title"] = (
         df["title"].fillna(df.get("name","")).astype(str)
         .str.lower()
-        .str.replace(r"[^a-z0-9 ]", "", regex=True)
-        .str.replace(r"\s+", " ", regex=True)
+        .str.replace(_NON_ALNUM_RE, "", regex=True)
+        .str.replace(_WS_RE, " ", regex=True)
         .str.strip()
     )
 
     # pivot mean price per platform
-    summary = df.pivot_table(index="normalized_title", columns="platform", values="price", aggfunc="mean").reset_index()
-    # compute difference columns
-    def compare(row):
-        a = row.get("Amazon")
-        f = row.get("Flipkart")
-        if pd.isna(a) or pd.isna(f):
-            return "Incomplete data"
-        if a < f:
-            diff = ((f - a) / f) * 100
-            return f"Amazon cheaper by {diff:.2f}%"
-        elif f < a:
-            diff = ((a - f) / a) * 100
-            return f"Flipkart cheaper by {diff:.2f}%"
-        else:
-            return "Same price"
+    summary = df.pivot_table(index="normalized_title", columns="platform", values="price", aggfunc="mean", observed=True).reset_index()
+    # compute difference columns (vectorized over the whole pivot)
+    nan_col = pd.Series(np.nan, index=summary.index)
+    a = summary.get("Amazon", nan_col).to_numpy(dtype=float)
+    f = summary.get("Flipkart", nan_col).to_numpy(dtype=float)
+    incomplete = np.isnan(a) | np.isnan(f)
+    amazon_cheaper = ~incomplete & (a < f)
+    flipkart_cheaper = ~incomplete & (f < a)
+
+    comparison = np.full(len(summary), "Same price", dtype=object)
+    comparison[incomplete] = "Incomplete data"
+    comparison[amazon_cheaper] = np.char.mod(
+        "Amazon cheaper by %.2f%%", (f[amazon_cheaper] - a[amazon_cheaper]) / f[amazon_cheaper] * 100
+    )
+    comparison[flipkart_cheaper] = np.char.mod(
+        "Flipkart cheaper by %.2f%%", (a[flipkart_cheaper] - f[flipkart_cheaper]) / a[flipkart_cheaper] * 100
+    )
+    summary["Comparison"] = comparison
 
-    summary["Comparison"] = summary.apply(compare, axis=1)
-    latest = df.groupby("normalized_title")["title"].agg(lambda x: x.dropna().iloc[-1] if len(x.dropna()) else "").reset_index()
+    latest = df.dropna(subset=["title"]).groupby("normalized_title")["title"].last().reset_index()
     out = summary.merge(latest, on="normalized_title", how="left")
     out = out.rename(columns={"title": "representative_title"})
+    out["representative_title"] = out["representative_title"].fillna("")
     out.to_csv(output_path, index=False)
     return out
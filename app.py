@@ -3,16 +3,63 @@
 import streamlit as st
 import pandas as pd
 import os
-from utils.savetocsv import save_scraped_data
-from scrapers.amazonscraper import search_amazon
+import asyncio
+from savetocsv import save_scraped_data
+from utils import batch_len, concat_batches, read_scraped_csv, to_numeric_price
+from scrapers.amazonscraper import search_amazon_async
 from scrapers.flipkartscraper import scrape_flipkart_prices
 from models.modeltrainer import train_and_evaluate_models
 
 st.set_page_config(page_title="E-Commerce Pricing DSS", layout="wide")
 
+SCRAPED_CSV = "outputs/scraped_results.csv"
+
+
+@st.cache_data(show_spinner=False)
+def load_clean(path, mtime):
+    # mtime is part of the cache key, so a rewritten file is parsed and cleaned exactly once
+    df = read_scraped_csv(path)
+    df["price_num"] = to_numeric_price(df["price"])
+    df["platform"] = df["platform"].astype("category")  # 2 distinct values → integer-coded groupby
+    return df
+
+
+def _non_empty(batch, platform):
+    # Raising keeps st.cache_data from memoizing a blocked/empty page for the whole TTL
+    if not batch_len(batch):
+        raise RuntimeError(f"{platform} returned no results")
+    return batch
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_amazon(query):
+    return _non_empty(asyncio.run(search_amazon_async(query)), "Amazon")
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_flipkart(query):
+    return _non_empty(scrape_flipkart_prices(query), "Flipkart")
+
+
+async def scrape_all(query):
+    # Each platform is cached separately (a failure or empty batch raises, so it is
+    # never memoized) and both run concurrently in worker threads.
+    return await asyncio.gather(
+        asyncio.to_thread(cached_amazon, query),
+        asyncio.to_thread(cached_flipkart, query),
+        return_exceptions=True,
+    )
+
 st.title("📊 E-Commerce Pricing Intelligence DSS")
 st.markdown("Integrated decision support system for automated price intelligence and prediction")
 
+# --- Sidebar ---
+if st.sidebar.button("♻️ Reload Data"):
+    load_clean.clear()  # scraper caches are left intact
+
+# --- Data (one parse + clean per file version, shared by all tabs) ---
+df = load_clean(SCRAPED_CSV, os.path.getmtime(SCRAPED_CSV)) if os.path.exists(SCRAPED_CSV) else None
+
 # --- Tabs ---
 tab1, tab2, tab3 = st.tabs(["🛒 Scraping & Data", "📈 Price Analytics", "🤖 Price Prediction"])
 
@@ -23,49 +70,46 @@ with tab1:
 
     if st.button("Scrape Amazon + Flipkart"):
         with st.spinner("Scraping in progress..."):
-            all_data = []
-
-            try:
-                amazon_data = search_amazon(product_query)
-                all_data.extend(amazon_data)
-            except Exception as e:
-                st.error(f"Amazon scraper failed: {e}")
-
-            try:
-                flipkart_data = scrape_flipkart_prices(product_query)
-                all_data.extend(flipkart_data)
-            except Exception as e:
-                st.error(f"Flipkart scraper failed: {e}")
-
-            if all_data:
-                save_scraped_data(all_data)
-                st.success(f"✅ {len(all_data)} new records scraped and saved.")
+            amazon_data, flipkart_data = asyncio.run(scrape_all(product_query))
+
+            if isinstance(amazon_data, Exception):
+                st.error(f"Amazon scraper failed: {amazon_data}")
+                amazon_data = None
+
+            if isinstance(flipkart_data, Exception):
+                st.error(f"Flipkart scraper failed: {flipkart_data}")
+                flipkart_data = None
+
+            all_data = concat_batches(*(b for b in (amazon_data, flipkart_data) if b))
+            if batch_len(all_data):
+                if save_scraped_data(all_data) is None:
+                    st.info("All scraped listings were already saved today at the same price — nothing new to write.")
+                else:
+                    st.success(f"✅ {batch_len(all_data)} records scraped and saved.")
             else:
                 st.warning("No data retrieved from scrapers.")
 
     st.divider()
-    if os.path.exists("outputs/scraped_results.csv"):
-        df = pd.read_csv("outputs/scraped_results.csv")
+    if df is not None:
         st.dataframe(df.tail(10), use_container_width=True)
-        st.download_button("⬇️ Download Full Dataset", data=df.to_csv(index=False).encode("utf-8"), file_name="scraped_results.csv")
+        with open(SCRAPED_CSV, "rb") as fh:
+            st.download_button("⬇️ Download Full Dataset", data=fh.read(), file_name="scraped_results.csv")
     else:
         st.info("No data available yet. Scrape to generate results.")
 
 # ---------------- TAB 2 ----------------
 with tab2:
     st.header("Competitor Pricing Analytics")
-    if os.path.exists("outputs/scraped_results.csv"):
-        df = pd.read_csv("outputs/scraped_results.csv")
+    if df is not None:
         st.metric("Total Entries", len(df))
         st.metric("Unique Products", df["title"].nunique())
 
         st.subheader("Average Price by Platform")
-        avg_price = df.groupby("platform")["price"].apply(lambda x: pd.to_numeric(x.str.replace("₹", "").str.replace(",", ""), errors='coerce').mean())
+        avg_price = df.groupby("platform", observed=True)["price_num"].mean()
         st.bar_chart(avg_price)
 
         st.subheader("Top 5 Cheapest Products")
-        df["price_num"] = pd.to_numeric(df["price"].str.replace("₹", "").str.replace(",", ""), errors="coerce")
-        cheapest = df.sort_values("price_num").head(5)
+        cheapest = df.nsmallest(5, "price_num")  # partial selection, no full sort
         st.dataframe(cheapest[["title", "platform", "price", "rating", "url"]])
     else:
         st.warning("Please scrape data first.")
@@ -75,8 +119,7 @@ with tab3:
     st.header("Price Prediction Models")
 
     if st.button("Train Models"):
-        if os.path.exists("outputs/scraped_results.csv"):
-            df = pd.read_csv("outputs/scraped_results.csv")
+        if df is not None:
             results = train_and_evaluate_models(df)
             st.success("Model training completed.")
             st.dataframe(results)
@@ -1,7 +1,7 @@
-import pandas as pd
 import numpy as np
 import os
 from datetime import datetime
+from utils import read_scraped_csv, to_numeric_price
 
 def analyze_latest_scrape():
     folder = "outputs"
@@ -14,31 +14,24 @@ def analyze_latest_scrape():
     file_path = os.path.join(folder, latest_file)
     print(f"📂 Using latest scraped file: {file_path}")
 
-    df = pd.read_csv(file_path)
+    df = read_scraped_csv(file_path, columns=["price", "platform"])
 
     # --- Clean and convert prices ---
-    df["price"] = (
-        df["price"]
-        .astype(str)
-        .str.replace("₹", "", regex=False)
-        .str.replace(",", "", regex=False)
-        .str.strip()
-    )
-
-    df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    df["price"] = to_numeric_price(df["price"])
     df = df[df["price"].notnull() & (df["price"] > 0)]
 
     if df.empty:
         raise ValueError("No valid price data found after cleaning. Check your scraped data.")
 
     # --- Market metrics ---
-    prices = df["price"].values
-    mean_p, std_p = np.mean(prices), np.std(prices)
-    low_p, high_p = np.min(prices), np.max(prices)
-    median_p = np.median(prices)
+    prices = df["price"].to_numpy(dtype=float)
+    mean_p, std_p = prices.mean(), prices.std()
+    low_p, median_p, high_p = np.percentile(prices, [0, 50, 100])
 
-    amazon_mean = df[df["platform"].str.lower().str.contains("amazon", na=False)]["price"].mean()
-    flip_mean = df[df["platform"].str.lower().str.contains("flipkart", na=False)]["price"].mean()
+    # One groupby pass yields every platform's mean
+    platform_means = df.groupby(df["platform"].astype("string").str.lower())["price"].mean()
+    amazon_mean = platform_means.get("amazon", np.nan)
+    flip_mean = platform_means.get("flipkart", np.nan)
 
     # --- Derived metrics ---
     rec_penetration = mean_p - 0.5 * std_p
@@ -49,52 +42,54 @@ def analyze_latest_scrape():
     volatility = (high_p - low_p) / mean_p * 100 if mean_p > 0 else 0
     platform_bias = abs(amazon_mean - flip_mean) / mean_p * 100 if mean_p > 0 else 0
 
-    # --- Safe print helper ---
-    def safe_price(p):
-        return f"₹{p:,.0f}" if pd.notna(p) else "N/A"
+    # --- Format every price once ---
+    vals = np.array([low_p, high_p, mean_p, median_p, std_p,
+                     rec_penetration, rec_competitive, rec_premium, amazon_mean, flip_mean])
+    (low_s, high_s, mean_s, median_s, std_s,
+     pen_s, comp_s, prem_s, amz_s, flip_s) = [f"₹{v:,.0f}" if not np.isnan(v) else "N/A" for v in vals]
+
+    metrics = (
+        f"Min Price: {low_s}\n"
+        f"Max Price: {high_s}\n"
+        f"Mean Price: {mean_s}\n"
+        f"Median Price: {median_s}\n"
+        f"Std Deviation: {std_s}\n"
+        f"Volatility Index: {volatility:.2f}%\n"
+        f"Platform Bias: {platform_bias:.2f}%\n"
+        f"Confidence Index: {confidence*100:.1f}%\n"
+    )
 
     # --- Print report ---
-    print("\n📊 MARKET PRICE INTELLIGENCE REPORT")
-    print("─────────────────────────────────────")
-    print(f"Min Price: {safe_price(low_p)}")
-    print(f"Max Price: {safe_price(high_p)}")
-    print(f"Mean Price: {safe_price(mean_p)}")
-    print(f"Median Price: {safe_price(median_p)}")
-    print(f"Std Deviation: {safe_price(std_p)}")
-    print(f"Volatility Index: {volatility:.2f}%")
-    print(f"Platform Bias: {platform_bias:.2f}%")
-    print(f"Confidence Index: {confidence*100:.1f}%")
-
-    print("\n💡 PRICE RECOMMENDATIONS")
-    print("─────────────────────────────────────")
-    print(f"Penetration Strategy: {safe_price(rec_penetration)}")
-    print(f"Competitive Strategy: {safe_price(rec_competitive)}")
-    print(f"Premium Strategy: {safe_price(rec_premium)}")
-
-    print("\n⚙️ PLATFORM AVERAGES")
-    print(f"Amazon Mean: {safe_price(amazon_mean)}")
-    print(f"Flipkart Mean: {safe_price(flip_mean)}")
+    print(
+        "\n📊 MARKET PRICE INTELLIGENCE REPORT\n"
+        "─────────────────────────────────────\n"
+        f"{metrics}"
+        "\n💡 PRICE RECOMMENDATIONS\n"
+        "─────────────────────────────────────\n"
+        f"Penetration Strategy: {pen_s}\n"
+        f"Competitive Strategy: {comp_s}\n"
+        f"Premium Strategy: {prem_s}\n"
+        "\n⚙️ PLATFORM AVERAGES\n"
+        f"Amazon Mean: {amz_s}\n"
+        f"Flipkart Mean: {flip_s}"
+    )
 
-    # --- Save report ---
+    # --- Save report (single write) ---
     out_path = os.path.join("outputs", "pricing_analysis_report.txt")
+    report = (
+        f"Pricing Intelligence Report ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})\n"
+        f"Source: {latest_file}\n\n"
+        f"{metrics}\n"
+        "Price Recommendations:\n"
+        f"  Penetration Strategy: {pen_s}\n"
+        f"  Competitive Strategy: {comp_s}\n"
+        f"  Premium Strategy: {prem_s}\n\n"
+        "Platform Averages:\n"
+        f"  Amazon Mean: {amz_s}\n"
+        f"  Flipkart Mean: {flip_s}\n"
+    )
     with open(out_path, "w", encoding="utf-8") as f:
-        f.write(f"Pricing Intelligence Report ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})\n")
-        f.write(f"Source: {latest_file}\n\n")
-        f.write(f"Min Price: {safe_price(low_p)}\n")
-        f.write(f"Max Price: {safe_price(high_p)}\n")
-        f.write(f"Mean Price: {safe_price(mean_p)}\n")
-        f.write(f"Median Price: {safe_price(median_p)}\n")
-        f.write(f"Std Deviation: {safe_price(std_p)}\n")
-        f.write(f"Volatility Index: {volatility:.2f}%\n")
-        f.write(f"Platform Bias: {platform_bias:.2f}%\n")
-        f.write(f"Confidence Index: {confidence*100:.1f}%\n\n")
-        f.write("Price Recommendations:\n")
-        f.write(f"  Penetration Strategy: {safe_price(rec_penetration)}\n")
-        f.write(f"  Competitive Strategy: {safe_price(rec_competitive)}\n")
-        f.write(f"  Premium Strategy: {safe_price(rec_premium)}\n\n")
-        f.write("Platform Averages:\n")
-        f.write(f"  Amazon Mean: {safe_price(amazon_mean)}\n")
-        f.write(f"  Flipkart Mean: {safe_price(flip_mean)}\n")
+        f.write(report)
 
     print(f"\n🧾 Report saved to: {out_path}")
 
@@ -1,7 +1,10 @@
+import atexit
 import logging
 import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 
 # ---------------------------------------------------------------------
@@ -11,45 +14,71 @@ ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_DIR = os.path.join(ROOT_DIR, "logs")
 os.makedirs(LOG_DIR, exist_ok=True)
 
+# One queue + background listener per log file; loggers only enqueue records
+_queues = {}
+_loggers = {}
+_lock = threading.Lock()
+
+
+def _queue_for(log_file: str):
+    """
+    Return the queue feeding `log_file`, starting its QueueListener on first use.
+    The listener thread owns the rotating file + console handlers, so disk I/O
+    and rotation never block the caller (thread or coroutine) that logs.
+    """
+    with _lock:
+        if log_file in _queues:
+            return _queues[log_file]
+
+        log_path = os.path.join(LOG_DIR, log_file)
+
+        # File handler (1 MB max, 3 backups)
+        file_handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
+
+        # Console handler
+        console_handler = logging.StreamHandler(sys.stdout)
+
+        # Formatter
+        formatter = logging.Formatter(
+            fmt="%(asctime)s [%(levelname)s] [%(name)s] - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
+
+        file_handler.setFormatter(formatter)
+        console_handler.setFormatter(formatter)
+
+        log_queue = queue.Queue(-1)
+        listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)  # flush pending records on exit
+
+        _queues[log_file] = log_queue
+        return log_queue
+
 
 def setup_logger(name: str, log_file: str = "scraper.log"):
     """
-    Creates and configures a rotating logger that writes to /logs/scraper.log.
+    Creates and configures a logger that writes to /logs/scraper.log (rotating).
     Works regardless of where the script is called from (main dir or subdir).
+    Records go through a QueueHandler; repeat calls return the cached logger.
     """
 
-    log_path = os.path.join(LOG_DIR, log_file)
+    cached = _loggers.get(name)
+    if cached is not None:
+        return cached
 
     # Create logger
     logger = logging.getLogger(name)
     logger.setLevel(logging.DEBUG)  # DEBUG → INFO → WARNING → ERROR → CRITICAL
 
     # Prevent duplicate handlers
-    if logger.hasHandlers():
-        return logger
-
-    # File handler (1 MB max, 3 backups)
-    file_handler = RotatingFileHandler(log_path, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
-
-    # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
-
-    # Formatter
-    formatter = logging.Formatter(
-        fmt="%(asctime)s [%(levelname)s] [%(name)s] - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
-
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    if not logger.hasHandlers():
+        logger.addHandler(QueueHandler(_queue_for(log_file)))
 
-    # Startup message
-    logger.info(f"Logger initialized for module: {name} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        # Startup message
+        logger.info(f"Logger initialized for module: {name} at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
+    _loggers[name] = logger
     return logger
 
 
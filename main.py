@@ -1,14 +1,25 @@
 # main.py
-from amazonscraper import search_amazon
-from flipkartscraper import scrape_flipkart_prices
+import asyncio
+from scrapers.amazonscraper import search_amazon_async
+from scrapers.flipkartscraper import scrape_flipkart_async
 from savetocsv import save_scraped_data
 from logger import setup_logger
+from utils import batch_len, concat_batches, empty_batch
 
 # Import ML pipeline modules
 from ml_pipeline.train_model import train_and_save
 from ml_pipeline.predict import predict_price
 
 
+async def scrape_all(query):
+    """Run both scrapers concurrently; a failure is returned in place of that platform's rows."""
+    return await asyncio.gather(
+        search_amazon_async(query),
+        scrape_flipkart_async(query),
+        return_exceptions=True,
+    )
+
+
 def main():
     logger = setup_logger("main")
 
@@ -27,40 +38,39 @@ def main():
     logger.info(f"Starting unified scraping for: {product_query}")
 
     # =========================
-    # 2️⃣ Amazon Scraper
+    # 2️⃣ Amazon + Flipkart Scrapers (concurrent)
     # =========================
-    try:
-        logger.info("🛒 Fetching Amazon results...")
-        amazon_data = search_amazon(product_query)
-        logger.info(f"✅ Amazon: {len(amazon_data)} items scraped.")
-    except Exception as e:
-        logger.error(f"❌ Amazon scraper failed: {e}")
-        amazon_data = []
+    logger.info("🛒 Fetching Amazon + Flipkart results...")
+    amazon_data, flipkart_data = asyncio.run(scrape_all(product_query))
 
-    # =========================
-    # 3️⃣ Flipkart Scraper
-    # =========================
-    try:
-        logger.info("🛍️ Fetching Flipkart results...")
-        flipkart_data = scrape_flipkart_prices(product_query)
-        logger.info(f"✅ Flipkart: {len(flipkart_data)} items scraped.")
-    except Exception as e:
-        logger.error(f"❌ Flipkart scraper failed: {e}")
-        flipkart_data = []
+    if isinstance(amazon_data, Exception):
+        logger.error(f"❌ Amazon scraper failed: {amazon_data}")
+        amazon_data = empty_batch()
+    else:
+        logger.info(f"✅ Amazon: {batch_len(amazon_data)} items scraped.")
+
+    if isinstance(flipkart_data, Exception):
+        logger.error(f"❌ Flipkart scraper failed: {flipkart_data}")
+        flipkart_data = empty_batch()
+    else:
+        logger.info(f"✅ Flipkart: {batch_len(flipkart_data)} items scraped.")
 
     # =========================
-    # 4️⃣ Combine & Save
+    # 3️⃣ Combine & Save
     # =========================
-    combined_data = amazon_data + flipkart_data
-    if not combined_data:
+    combined_data = concat_batches(amazon_data, flipkart_data)
+    if not batch_len(combined_data):
         logger.warning("⚠️ No data scraped from either platform. Exiting.")
         return
 
-    save_scraped_data(combined_data)
-    logger.info(f"💾 Data saved successfully. Total entries: {len(combined_data)}")
+    if save_scraped_data(combined_data) is None:
+        # Nothing new since the last save today; train on the latest saved file as usual
+        logger.info("🔁 No new observations to save — reusing the latest saved data.")
+    else:
+        logger.info(f"💾 Data saved successfully. Total entries: {batch_len(combined_data)}")
 
     # =========================
-    # 5️⃣ Train Model
+    # 4️⃣ Train Model
     # =========================
     try:
         logger.info("🤖 Training model on scraped data...")
@@ -71,7 +81,7 @@ def main():
         return
 
     # =========================
-    # 6️⃣ Optional Prediction
+    # 5️⃣ Optional Prediction
     # =========================
     predict_choice = input("\nDo you want to predict a price? (y/n): ").strip().lower()
     if predict_choice == "y":
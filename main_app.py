@@ -3,13 +3,20 @@
 # Streamlit UI | Intelligent Scraper | Unified Prediction
 # ==============================================================
 
-import os, glob, subprocess, traceback
+import os, re, asyncio, traceback
 from datetime import datetime
 import numpy as np, pandas as pd, streamlit as st, joblib
 import plotly.express as px
 from fpdf import FPDF
 import matplotlib.pyplot as plt
-from ml_pipeline.predict import predict_price
+from ml_pipeline.predict import predict_price_batch
+from ml_pipeline.preprocessing import preprocess_batch
+from utils import batch_len, concat_batches, to_numeric_price
+from logger import setup_logger
+from scrapers.amazonscraper import search_amazon_async
+from scrapers.flipkartscraper import scrape_flipkart_async
+
+logger = setup_logger("main_app")
 
 # ==============================================================
 # PAGE CONFIG & THEME
@@ -35,16 +42,12 @@ st.caption("AI-Powered Market Price Insights · Scrape • Predict • Compare 
 st.divider()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-OUTPUT_DIR, MODEL_DIR, SCRAPERS_DIR = (os.path.join(BASE_DIR, x) for x in
-                                       ("outputs", "model", "scrapers"))
+OUTPUT_DIR, MODEL_DIR = (os.path.join(BASE_DIR, x) for x in ("outputs", "model"))
 for d in [OUTPUT_DIR, MODEL_DIR]: os.makedirs(d, exist_ok=True)
 
 # ==============================================================
 # UTILITIES
 # ==============================================================
-def to_numeric_price(series): 
-    s = series.astype(str).str.replace("₹","").str.replace(",","")
-    return pd.to_numeric(s.str.extract(r"(\d+\.?\d*)")[0], errors="coerce")
 def format_currency(x): 
     try: return f"₹{float(x):,.0f}"
     except: return "—"
@@ -57,49 +60,130 @@ def load_model():
     except Exception as e: return None,f"⚠️ Error loading model: {e}"
 model, model_err = load_model()
 
+@st.cache_data(show_spinner=False)
+def load_latest_data(path, mtime):
+    # (path, mtime) is the cache key: each CSV version is parsed (multithreaded pyarrow reader) and priced once
+    sidecar = os.path.splitext(path)[0]+".parquet"
+    if os.path.exists(sidecar):   # typed copy written by _scrape_to_csv: no parsing, no price regex
+        df = pd.read_parquet(sidecar, engine="pyarrow")
+        if "price_num" in df.columns: return df   # anything else with that name isn't ours → parse the CSV
+    df = pd.read_csv(path, engine="pyarrow")
+    df["price_num"] = to_numeric_price(df.get("price", df.iloc[:,1]))
+    if "platform" in df.columns: df["platform"] = df["platform"].astype("category")   # integer-coded groupby
+    return df
+
+_FEATURE_ARTIFACTS = ("scaler.npz", "scaler.pkl", "brand_stats.csv", "platform_encoder.pkl")
+
+def feature_artifact_mtimes():
+    # preprocess_batch output depends on these too → part of load_and_featurize's cache key
+    return tuple(os.path.getmtime(p) if os.path.exists(p) else None
+                 for p in (os.path.join(MODEL_DIR, a) for a in _FEATURE_ARTIFACTS))
+
+@st.cache_data(show_spinner=False)
+def load_and_featurize(path, mtime, artifact_mtimes):
+    # priced rows + their model features, built once per (file version, trained artifacts) and reused across reruns
+    df = load_latest_data(path, mtime)
+    if "platform" not in df.columns: df["platform"]="Unknown"
+    df = df.dropna(subset=["price_num"])
+    return df, preprocess_batch(df)
+
+@st.cache_data(show_spinner=False)
+def load_preview(path, mtime, n=30):
+    # only the first n rows are parsed (the C reader stops early; pyarrow has no nrows)
+    df = pd.read_csv(path, nrows=n)
+    df["price_num"] = to_numeric_price(df.get("price", df.iloc[:,1]))
+    return df
+
+@st.cache_data(ttl=5, show_spinner=False)
+def latest_csv(d):
+    # one scandir pass (DirEntry caches the stat) → (path, mtime) of the newest CSV, or None
+    newest = max(((e.stat().st_mtime, e.path) for e in os.scandir(d) if e.name.endswith(".csv")), default=None)
+    return (newest[1], newest[0]) if newest else None
+
 # ==============================================================
 # SCRAPER FUNCTION
 # ==============================================================
+class PartialScrape(Exception):
+    # raised out of _scrape_to_csv so a partial result is used once but never cached
+    def __init__(self, path, failed):
+        super().__init__(path, failed)
+        self.path, self.failed = path, failed
+
 def run_scraper(keyword:str, platform:str):
     st.info(f"🔎 Scraping for **{keyword}** on **{platform}**…")
-    amz, flp = [os.path.join(SCRAPERS_DIR,x) for x in ("amazonscraper.py","flipkartscraper.py")]
-    if platform in ("Amazon","Both") and os.path.exists(amz):
-        subprocess.run(["python",amz],cwd=BASE_DIR,check=False)
-    if platform in ("Flipkart","Both") and os.path.exists(flp):
-        subprocess.run(["python",flp],cwd=BASE_DIR,check=False)
-    amz_files, flp_files = glob.glob(f"{OUTPUT_DIR}/*amazon*.csv"), glob.glob(f"{OUTPUT_DIR}/*flipkart*.csv")
-
-    if platform=="Both" and amz_files and flp_files:
-        a, f = pd.read_csv(max(amz_files,key=os.path.getmtime)), pd.read_csv(max(flp_files,key=os.path.getmtime))
-        a["platform"], f["platform"] = "Amazon","Flipkart"
-        merged = pd.concat([a,f],ignore_index=True)
-        merged["price_num"]=to_numeric_price(merged.get("price",merged.iloc[:,1]))
-        merged.drop_duplicates(subset=["title","platform"],inplace=True)
-        fname=os.path.join(OUTPUT_DIR,f"scraped_results_combined_{keyword.replace(' ','_')}_{datetime.now():%Y%m%d_%H%M%S}.csv")
-        merged.to_csv(fname,index=False,encoding="utf-8-sig")
-        return fname
-    elif platform=="Amazon" and amz_files:
-        return max(amz_files,key=os.path.getmtime)
-    elif platform=="Flipkart" and flp_files:
-        return max(flp_files,key=os.path.getmtime)
-    else: return None
+    try:
+        path = _scrape_to_csv(keyword, platform)   # cached per (keyword, platform) for an hour
+    except LookupError as e:   # empty scrape: raised, so it was never cached
+        st.warning(f"⚠️ {e}")
+        return None
+    except PartialScrape as e:   # some platform failed: show what we got, retry it next run
+        for name, err in e.failed:
+            st.warning(f"⚠️ {name} scraper failed: {err}")
+        path = e.path
+    if os.path.exists(path):
+        latest_csv.clear()   # new file → rescan on the next lookup
+        return path
+    _scrape_to_csv.clear()   # cached path whose file was deleted since
+    return None
+
+async def _gather_scrapers(jobs):
+    return await asyncio.gather(*jobs, return_exceptions=True)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _scrape_to_csv(keyword:str, platform:str):
+    """Scrape, write CSV + typed sidecar; returns the CSV path (raises PartialScrape if a platform failed)."""
+    jobs = {}
+    if platform in ("Amazon","Both"): jobs["Amazon"] = search_amazon_async(keyword)
+    if platform in ("Flipkart","Both"): jobs["Flipkart"] = scrape_flipkart_async(keyword)
+    results = dict(zip(jobs, asyncio.run(_gather_scrapers(jobs.values()))))
+    failed = [(name, str(r)) for name, r in results.items() if isinstance(r, Exception)]
+    for name, err in failed: logger.error(f"❌ {name} scraper failed: {err}")
+    batch = concat_batches(*(b for b in results.values() if not isinstance(b,Exception)))
+    if not batch_len(batch):
+        errs = "; ".join(f"{name} failed: {err}" for name, err in failed)
+        raise LookupError(f"No results for {keyword!r} on {platform}" + (f" ({errs})" if errs else ""))
+
+    merged = pd.DataFrame(batch)
+    merged["price_num"]=to_numeric_price(merged["price"])
+    merged = merged.drop_duplicates(subset=["title","platform"])
+    tag = "combined" if platform=="Both" else platform.lower()
+    fname=os.path.join(OUTPUT_DIR,f"scraped_results_{tag}_{keyword.replace(' ','_')}_{datetime.now():%Y%m%d_%H%M%S}.csv")
+    merged.to_csv(fname,index=False,encoding="utf-8-sig")
+    # typed sidecar for load_latest_data: numeric price/rating, dictionary-encoded platform
+    merged.assign(price=merged["price_num"],rating=pd.to_numeric(merged["rating"],errors="coerce"),
+                  platform=merged["platform"].astype("category")).to_parquet(os.path.splitext(fname)[0]+".parquet",index=False)
+    if failed: raise PartialScrape(fname, failed)
+    return fname
 
 # ==============================================================
 # SMART FILTER — MAIN vs VARIANTS
 # ==============================================================
+_TITLE_PUNCT_RE, _WS_RE = re.compile(r"[\(\)\[\],\-]"), re.compile(r"\s+")
+
 def split_main_and_related(df, keyword):
     if df.empty: return pd.DataFrame(),pd.DataFrame()
-    t = df["title"].astype(str).str.lower().replace(r"[\(\)\[\],\-]", " ", regex=True).str.replace(r"\s+"," ",regex=True)
+    t = df["title"].astype(str).str.lower().str.replace(_TITLE_PUNCT_RE," ",regex=True).str.replace(_WS_RE," ",regex=True)
     key = keyword.lower().strip().replace("gb"," gb")
     base = key.replace(" ",r"\s*[\(\)\-\,]*\s*")
     main_pat = rf"(apple\s*)?{base}(?!\s*(e|plus|pro|max|ultra|mini|se|air))"
     rel_pat  = rf"{base}\s*(e|plus|pro|max|ultra|mini|se|air)"
-    main, rel = df[t.str.contains(main_pat,regex=True)], df[t.str.contains(rel_pat,regex=True)]
-    for d in [main,rel]:
-        if not d.empty:
-            d["rounded_price"]=d["price_num"].round(-2)
-            d.drop_duplicates(subset=["platform","rounded_price"],inplace=True)
-    return main,rel
+    # one scan over the titles: whichever alternative matches first classifies the row
+    hit = t.str.extract(re.compile(rf"(?P<main>{main_pat})|(?P<rel>{rel_pat})"))
+    main, rel = df[hit["main"].notna()], df[hit["rel"].notna()]
+    dedup = lambda d: d.assign(rounded_price=(d["price_num"]//100)*100).drop_duplicates(subset=["platform","rounded_price"])
+    return dedup(main),dedup(rel)
+
+def listing_cards_html(d):
+    # every card built with column-wise string ops, then joined into one markdown blob
+    return (
+        "<div style='background:rgba(20,20,25,0.55);padding:12px 16px;"
+        "border-radius:12px;margin-bottom:8px;border:1px solid rgba(255,255,255,0.05);'>"
+        "<span style='background:rgba(255,255,255,0.08);padding:3px 8px;"
+        "border-radius:8px;font-size:12px;'>" + d["platform"].astype(str) + "</span>"
+        "<b style='margin-left:6px;color:#f2f3f4;font-size:15px;'>" + d["title"].astype(str).str.slice(0,160) + "...</b><br>"
+        "<span style='color:#ffcc00;'>💰 Market: ₹" + d["price_num"].map("{:,.0f}".format) + "</span><br>"
+        "<a href='" + d["url"].astype(str) + "' target='_blank' style='color:#00f2ff;text-decoration:none;'>Open</a></div>"
+    ).str.cat(sep="")
 
 # ==============================================================
 # SIDEBAR
@@ -125,38 +209,21 @@ with tab_scraper:
     if st.button("🚀 Run Scraper",use_container_width=True):
         path = run_scraper(keyword,platform)
         if path and os.path.exists(path):
-            df=pd.read_csv(path); df["price_num"]=to_numeric_price(df.get("price",df.iloc[:,1])); df.dropna(subset=["price_num"],inplace=True)
+            df=load_latest_data(path,os.path.getmtime(path)).dropna(subset=["price_num"])
             main_df,rel_df = split_main_and_related(df,keyword)
-            tot, a, f = len(df), len(df[df["platform"].str.contains("amazon",case=False,na=False)]), len(df[df["platform"].str.contains("flipkart",case=False,na=False)])
+            counts = df["platform"].astype(str).str.lower().value_counts()   # one pass over the column
+            tot, a, f = len(df), counts.filter(like="amazon").sum(), counts.filter(like="flipkart").sum()
             st.success(f"✅ Merged Amazon + Flipkart → {os.path.basename(path)} ({tot} total)")
             c1,c2,c3=st.columns(3); c1.metric("Total Relevant",tot); c2.metric("Amazon",a); c3.metric("Flipkart",f)
 
             # --- main matches
             if not main_df.empty:
                 st.markdown("### 🔍 Matched Product Listings")
-                for _,r in main_df.iterrows():
-                    st.markdown(f"""
-                    <div style='background:rgba(20,20,25,0.55);padding:12px 16px;
-                    border-radius:12px;margin-bottom:8px;border:1px solid rgba(255,255,255,0.05);'>
-                    <span style='background:rgba(255,255,255,0.08);padding:3px 8px;
-                    border-radius:8px;font-size:12px;'>{r['platform']}</span>
-                    <b style='margin-left:6px;color:#f2f3f4;font-size:15px;'>{r['title'][:160]}...</b><br>
-                    <span style='color:#ffcc00;'>💰 Market: ₹{r['price_num']:,.0f}</span><br>
-                    <a href='{r['url']}' target='_blank' style='color:#00f2ff;text-decoration:none;'>Open</a></div>
-                    """,unsafe_allow_html=True)
+                st.markdown(listing_cards_html(main_df),unsafe_allow_html=True)
             # --- variants
             if not rel_df.empty:
                 st.markdown("### 💡 Related Model Variants")
-                for _,r in rel_df.iterrows():
-                    st.markdown(f"""
-                    <div style='background:rgba(20,20,25,0.55);padding:12px 16px;
-                    border-radius:12px;margin-bottom:8px;border:1px solid rgba(255,255,255,0.05);'>
-                    <span style='background:rgba(255,255,255,0.08);padding:3px 8px;
-                    border-radius:8px;font-size:12px;'>{r['platform']}</span>
-                    <b style='margin-left:6px;color:#f2f3f4;font-size:15px;'>{r['title'][:160]}...</b><br>
-                    <span style='color:#ffcc00;'>💰 Market: ₹{r['price_num']:,.0f}</span><br>
-                    <a href='{r['url']}' target='_blank' style='color:#00f2ff;text-decoration:none;'>Open</a></div>
-                    """,unsafe_allow_html=True)
+                st.markdown(listing_cards_html(rel_df),unsafe_allow_html=True)
 
 # ==============================================================
 # TAB 2 — PREDICTION
@@ -166,21 +233,22 @@ with tab_predict:
     if model_err: st.error(model_err)
     elif model is None: st.warning("⚠️ Model not loaded.")
     else:
-        files=sorted(glob.glob(os.path.join(OUTPUT_DIR,"*.csv")),key=os.path.getmtime,reverse=True)
-        if not files: st.warning("No scraped data found.")
+        latest=latest_csv(OUTPUT_DIR)
+        if not latest: st.warning("No scraped data found.")
         else:
-            f=files[0]; df=pd.read_csv(f); df["price_num"]=to_numeric_price(df.get("price",df.iloc[:,1]))
+            f=latest[0]
             st.caption(f"📦 Using latest scraped file: {os.path.basename(f)}")
-            if "platform" not in df.columns: df["platform"]="Unknown"
-            df=df.dropna(subset=["price_num"])
             try:
-                df["Predicted_Price"]=df.apply(lambda r: predict_price(r.to_dict(),"rf"),axis=1)
+                df,X=load_and_featurize(*latest, feature_artifact_mtimes())
+                df["Predicted_Price"]=predict_price_batch(df,"rf",X=X)   # one model.predict for all rows
                 df["Price_Gap"]=df["price_num"]-df["Predicted_Price"]
-                df["Status"]=np.where(abs(df["Price_Gap"])<500,"Fairly Priced",
-                                      np.where(df["Price_Gap"]>0,"Overpriced","Underpriced"))
-                comp=df.groupby("platform")[["price_num","Predicted_Price"]].mean().reset_index()
+                gap=df["Price_Gap"].to_numpy()
+                df["Status"]=np.select([np.abs(gap)<500, gap>0],["Fairly Priced","Overpriced"],default="Underpriced")
+                df["Status"]=pd.Categorical(df["Status"],categories=["Fairly Priced","Overpriced","Underpriced"])
+                comp=df.groupby("platform",observed=True,sort=False,as_index=False)[["price_num","Predicted_Price"]].mean()
                 st.markdown("### 📊 Platform-wise Pricing Comparison")
-                st.dataframe(comp.style.format({"price_num":"₹{:.0f}","Predicted_Price":"₹{:.0f}"}),use_container_width=True)
+                rupees=st.column_config.NumberColumn(format="₹%.0f")   # formatted client-side, no Styler HTML
+                st.dataframe(comp,column_config={"price_num":rupees,"Predicted_Price":rupees},use_container_width=True)
                 st.plotly_chart(px.bar(comp,x="platform",y=["price_num","Predicted_Price"],barmode="group",
                                        title="Market vs Predicted Price"),use_container_width=True)
             except Exception as e: st.error(f"Prediction failed: {e}")
@@ -190,14 +258,14 @@ with tab_predict:
 # ==============================================================
 with tab_reports:
     st.subheader("🧠 Reports / Insights")
-    files=sorted(glob.glob(os.path.join(OUTPUT_DIR,"*.csv")),key=os.path.getmtime,reverse=True)
-    if not files: st.info("No data yet.")
+    latest=latest_csv(OUTPUT_DIR)
+    if not latest: st.info("No data yet.")
     else:
-        df=pd.read_csv(files[0]); df["price_num"]=to_numeric_price(df.get("price",df.iloc[:,1]))
-        if {"price_num","Predicted_Price"}.issubset(df.columns):
-            st.plotly_chart(px.scatter(df,x="price_num",y="Predicted_Price",trendline="ols",
+        preview=load_preview(*latest)
+        if "Predicted_Price" in preview.columns:   # the scatter is the only view that needs every row
+            st.plotly_chart(px.scatter(load_latest_data(*latest),x="price_num",y="Predicted_Price",trendline="ols",
                                        title="Actual vs Predicted"),use_container_width=True)
-        st.dataframe(df.head(30),use_container_width=True)
+        st.dataframe(preview,use_container_width=True)
 
 st.markdown("<hr/>",unsafe_allow_html=True)
 st.caption("© Scrapwise DSS Pricing Intelligence | Streamlit")
@@ -2,7 +2,21 @@ import os
 import numpy as np
 import pandas as pd
 import joblib
-from ml_pipeline.preprocessing import preprocess_single_record
+from functools import lru_cache
+from ml_pipeline.preprocessing import preprocess_batch, preprocess_single_record
+
+
+@lru_cache(maxsize=4)
+def _load_model_cached(model_path, mtime):
+    model = joblib.load(model_path)
+    if hasattr(model, "n_jobs"):
+        model.n_jobs = -1  # trees predict in parallel on batch inputs
+    return model
+
+
+def _load_model(model_path):
+    # mtime is part of the cache key, so a retrained model is picked up on the next call
+    return _load_model_cached(model_path, os.path.getmtime(model_path))
 
 
 def predict_price(record, model_name="rf"):
@@ -26,7 +40,7 @@ def predict_price(record, model_name="rf"):
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"❌ Model file not found: {model_path}")
 
-    model = joblib.load(model_path)
+    model = _load_model(model_path)
 
     # -----------------------------
     # 3️⃣ Preprocess record
@@ -40,10 +54,7 @@ def predict_price(record, model_name="rf"):
     # -----------------------------
     expected_features = getattr(model, "feature_names_in_", None)
     if expected_features is not None:
-        missing = [c for c in expected_features if c not in X.columns]
-        for col in missing:
-            X[col] = 0
-        X = X[expected_features]
+        X = X.reindex(columns=expected_features, fill_value=0)
 
     # -----------------------------
     # 5️⃣ Predict using model directly (no scaling)
@@ -62,3 +73,34 @@ def predict_price(record, model_name="rf"):
     # 7️⃣ Return clean float for UI/log
     # -----------------------------
     return round(float(pred_price), 2)
+
+
+def predict_price_batch(df, model_name="rf", X=None):
+    """
+    Predict prices for every row of a DataFrame in one model call.
+    The model is loaded once and the rows are preprocessed together
+    (pass X to reuse features already built by preprocess_batch(df)).
+    Returns a float array (rupees) aligned with df's rows.
+    """
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    model_path = os.path.join(base_dir, "..", "model", f"{model_name}_model.pkl")
+
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"❌ Model file not found: {model_path}")
+
+    model = _load_model(model_path)
+
+    if X is None:
+        X = preprocess_batch(df)
+
+    # Align features with training model (missing columns → 0)
+    expected_features = getattr(model, "feature_names_in_", None)
+    if expected_features is not None:
+        X = X.reindex(columns=expected_features, fill_value=0)
+
+    try:
+        pred_log = model.predict(X)
+    except Exception as e:
+        raise RuntimeError(f"❌ Model prediction failed: {e}")
+
+    return np.round(np.expm1(pred_log), 2)
@@ -4,17 +4,110 @@ import re
 import joblib
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 from datetime import datetime
+from functools import lru_cache
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import OneHotEncoder
+from utils import to_numeric_price
 
 
-def clean_and_feature_engineer(path="outputs/scraped_results.csv"):
+BASE_FEATURES = ["rating", "days_since", "is_ultra", "is_fe", "title_len", "brand_mean", "brand_std"]
+FLAG_FEATURES = ["is_ultra", "is_fe"]  # 0/1 columns, stored as int8 alongside the platform one-hots
+NUMERIC_FEATURES = ["rating", "days_since", "title_len", "brand_mean", "brand_std"]  # standardized
+
+
+def _arrow_titles(title):
+    return pa.array(title.astype(str), type=pa.string(), from_pandas=True)
+
+
+def _extract_brand(title):
+    # RE2 extraction over the whole Arrow column; dictionary-encoded → categorical,
+    # so the stats groupby and .map work on integer codes
+    brand = pc.struct_field(pc.extract_regex(_arrow_titles(title), pattern=r"^(?P<brand>[A-Za-z0-9]+)"), [0])
+    brand = pc.utf8_upper(pc.fill_null(brand, "UNKNOWN")).dictionary_encode()
+    return brand.to_pandas().set_axis(title.index)
+
+
+def _platform(df):
+    if "platform" in df.columns:
+        s = df["platform"]
+        if isinstance(s.dtype, pd.CategoricalDtype) and "Unknown" not in s.cat.categories:
+            s = s.cat.add_categories("Unknown")  # fillna can't introduce a new category
+        return s.fillna("Unknown")
+    return pd.Series("Unknown", index=df.index)
+
+
+def _feature_engineer(df, enc, brand_stats, fallback_mean):
+    """
+    Column-wise feature engineering shared by training and prediction.
+    brand_stats: {"brand_mean": {brand: mean}, "brand_std": {brand: std}} (or None).
+    fallback_mean: brand_mean used for brands missing from brand_stats.
+    Returns: unscaled feature matrix (BASE_FEATURES + platform one-hots), same index as df,
+    with 0/1 columns as int8 and everything else as float32.
+    """
+    out = pd.DataFrame(index=df.index)
+
+    # --- Title & brand ---
+    if "title" in df.columns:
+        title = df["title"].astype(str)
+    elif "name" in df.columns:
+        title = df["name"].astype(str)
+    else:
+        title = pd.Series("", index=df.index)
+    titles = _arrow_titles(title)
+    brand = _extract_brand(title)
+
+    # --- Derived features ---
+    out["rating"] = pd.to_numeric(df["rating"], errors="coerce").fillna(0) if "rating" in df.columns else 0
+    if "timestamp" in df.columns:
+        out["days_since"] = (datetime.now() - pd.to_datetime(df["timestamp"], errors="coerce")).dt.days
+    else:
+        out["days_since"] = 0
+    out["is_ultra"] = pc.match_substring(titles, "ultra", ignore_case=True).to_numpy(zero_copy_only=False)
+    out["is_fe"] = pc.match_substring_regex(titles, r"\bFE\b", ignore_case=True).to_numpy(zero_copy_only=False)
+    out["title_len"] = pc.utf8_length(titles).to_numpy(zero_copy_only=False)
+
+    # --- Brand-level stats ---
+    if brand_stats is not None:
+        # astype: older pandas keeps a one-to-one map of a categorical as categorical
+        out["brand_mean"] = brand.map(brand_stats["brand_mean"]).astype("float64").fillna(fallback_mean)
+        out["brand_std"] = brand.map(brand_stats["brand_std"]).astype("float64").fillna(0)
+    else:
+        # last-resort fallback
+        out["brand_mean"] = 0
+        out["brand_std"] = 0
+
+    # --- Platform encoding ---
+    platform_cols = [f"platform_{c}" for c in enc.categories_[0]]
+    out[platform_cols] = enc.transform(_platform(df).to_frame("platform"))
+
+    X = out[BASE_FEATURES + platform_cols].fillna(0)
+    narrow = {c: np.int8 if c in FLAG_FEATURES or c in platform_cols else np.float32 for c in X.columns}
+    return X.astype(narrow)
+
+
+# Text columns are pinned to strings so the Arrow reader never guesses (e.g. "N/A" ratings)
+_CSV_TYPES = pacsv.ConvertOptions(column_types={c: pa.string() for c in ("title", "name", "price", "rating", "platform")})
+
+
+def _read_training_frame(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    # multithreaded Arrow C++ CSV reader; absent columns in _CSV_TYPES are simply ignored
+    return pacsv.read_csv(path, convert_options=_CSV_TYPES).to_pandas()
+
+
+def clean_and_feature_engineer(path="outputs/scraped_results.csv", save=True):
+    # save=False builds X/y without touching the deployed artifacts in model/ (used by the tuner)
     # === Ensure directories ===
-    os.makedirs("model", exist_ok=True)
+    if save:
+        os.makedirs("model", exist_ok=True)
 
     # === Load data ===
-    df = pd.read_csv(path)
+    df = _read_training_frame(path)
 
     # --- Title extraction ---
     if "title" in df.columns:
@@ -25,10 +118,7 @@ def clean_and_feature_engineer(path="outputs/scraped_results.csv"):
         raise ValueError("Input CSV must contain a 'title' or 'name' column.")
 
     # --- Price cleaning ---
-    df["price"] = pd.to_numeric(
-        df["price"].astype(str).str.replace(r"[^\d.]", "", regex=True),
-        errors="coerce"
-    )
+    df["price"] = to_numeric_price(df["price"])
     df = df.dropna(subset=["price"])
     df = df[df["price"] > 0]  # sanity filter
 
@@ -36,74 +126,40 @@ def clean_and_feature_engineer(path="outputs/scraped_results.csv"):
     q_low, q_high = df["price"].quantile([0.01, 0.99])
     df = df[df["price"].between(q_low, q_high)]
 
-    # --- Brand extraction ---
-    df["brand"] = (
-        df["title"]
-        .str.extract(r"^([A-Za-z0-9]+)", expand=False)
-        .fillna("UNKNOWN")
-        .str.upper()
-    )
-
-    # --- Rating ---
-    df["rating"] = pd.to_numeric(df.get("rating", 0), errors="coerce").fillna(0)
-
-    # --- Timestamp and recency ---
-    if "timestamp" not in df.columns:
-        df["timestamp"] = pd.Timestamp.now()
-    else:
-        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce").fillna(pd.Timestamp.now())
-    df["days_since"] = (datetime.now() - df["timestamp"]).dt.days
-
-    # --- Text-derived features ---
-    df["is_ultra"] = df["title"].str.contains("ultra", case=False).astype(int)
-    df["is_fe"] = df["title"].str.contains(r"\bFE\b", case=False).astype(int)
-    df["title_len"] = df["title"].str.len()
-
     # --- Brand-level price stats ---
     brand_stats = (
-        df.groupby("brand")["price"]
+        df["price"].groupby(_extract_brand(df["title"]).rename("brand"), observed=True)
         .agg(["mean", "std"])
         .rename(columns={"mean": "brand_mean", "std": "brand_std"})
     )
 
     # Save brand stats for prediction-time lookup (one-line)
-    brand_stats.reset_index().to_csv("model/brand_stats.csv", index=False)
-
-    # merge stats back
-    df = df.merge(brand_stats, left_on="brand", right_index=True, how="left")
-    df["brand_mean"].fillna(df["price"].mean(), inplace=True)
-    df["brand_std"].fillna(0, inplace=True)
-
-    # --- Platform encoding ---
-    df["platform"] = df.get("platform", "Unknown").fillna("Unknown")
+    if save:
+        brand_stats.reset_index().to_csv("model/brand_stats.csv", index=False)
 
+    # --- Platform encoder ---
     enc_path = "model/platform_encoder.pkl"
     if os.path.exists(enc_path):
         enc = joblib.load(enc_path)
-        platform_ohe = enc.transform(df[["platform"]])
     else:
         enc = OneHotEncoder(sparse_output=False, handle_unknown="ignore")
-        platform_ohe = enc.fit_transform(df[["platform"]])
-        joblib.dump(enc, enc_path)
-
-    platform_cols = [f"platform_{c}" for c in enc.categories_[0]]
-    df_platform = pd.DataFrame(platform_ohe, columns=platform_cols, index=df.index)
-    df = pd.concat([df, df_platform], axis=1)
-
-    # === Feature assembly ===
-    base_features = ["rating", "days_since", "is_ultra", "is_fe", "title_len", "brand_mean", "brand_std"]
-    features = base_features + platform_cols
-
-    X = df[features].fillna(0)
-    y = np.log1p(df["price"])  # log-transform target for stability
-
-    # --- Scaling numeric features ---
-    scaler_path = "model/scaler.pkl"
-    numeric_cols = ["rating", "days_since", "title_len", "brand_mean", "brand_std"]
-
-    scaler = StandardScaler()
-    X[numeric_cols] = scaler.fit_transform(X[numeric_cols])
-    joblib.dump({"scaler": scaler, "columns": numeric_cols}, scaler_path)
+        enc.fit(_platform(df).to_frame("platform"))
+        if save:
+            joblib.dump(enc, enc_path)
+
+    # === Feature assembly (shared with prediction) ===
+    X = _feature_engineer(df, enc, brand_stats.to_dict(), df["price"].mean())
+    # log-transform target for stability (precomputed by save_scraped_data in its Parquet files)
+    y = df["log_price"] if "log_price" in df.columns else np.log1p(df["price"])
+
+    # --- Scaling numeric features (float32 z-score, saved as mean/std arrays) ---
+    scaler_path = "model/scaler.npz"
+    Xn = X[NUMERIC_FEATURES].to_numpy(dtype=np.float32)
+    mean, std = Xn.mean(axis=0), Xn.std(axis=0)
+    std[std == 0] = 1  # constant columns pass through centred, as StandardScaler does
+    X[NUMERIC_FEATURES] = (Xn - mean) / std
+    if save:
+        np.savez(scaler_path, mean=mean, std=std, columns=np.array(NUMERIC_FEATURES))
 
     # === Train-test split ===
     X_train, X_test, y_train, y_test = train_test_split(
@@ -114,22 +170,63 @@ def clean_and_feature_engineer(path="outputs/scraped_results.csv"):
 
 
 # ----------------------------------------------------------------------
-#               Single Record Preprocessor (for Predictions)
+#               Cached artifact loaders (keyed on path + mtime, so
+#               re-running clean_and_feature_engineer invalidates them)
 # ----------------------------------------------------------------------
-def preprocess_single_record(record: dict):
+@lru_cache(maxsize=4)
+def _load_joblib(path, mtime):
+    return joblib.load(path)
+
+
+@lru_cache(maxsize=4)
+def _read_brand_stats(path, mtime):
+    brand_stats = pd.read_csv(path)
+    # brand_stats should have columns: brand, brand_mean, brand_std
+    if "brand" not in brand_stats.columns:
+        # if saved with index, reset
+        brand_stats = brand_stats.reset_index().rename(columns={brand_stats.columns[0]: "brand"})
+    # plain dicts: .map does O(1) lookups per brand category, no index alignment
+    return brand_stats.drop_duplicates("brand").set_index("brand")[["brand_mean", "brand_std"]].to_dict()
+
+
+def _load_encoder(path="model/platform_encoder.pkl"):
+    return _load_joblib(path, os.path.getmtime(path))
+
+
+@lru_cache(maxsize=4)
+def _read_scaler(path, mtime):
+    if path.endswith(".npz"):
+        with np.load(path) as z:
+            return z["mean"], z["std"], list(z["columns"])
+    # legacy model/scaler.pkl: {"scaler": StandardScaler, "columns": [...]}
+    obj = joblib.load(path)
+    scaler = obj["scaler"]
+    return scaler.mean_.astype(np.float32), scaler.scale_.astype(np.float32), list(obj["columns"])
+
+
+def _load_scaler(path="model/scaler.npz"):
+    """Returns (mean, std, columns) for the numeric-feature z-score."""
+    return _read_scaler(path, os.path.getmtime(path))
+
+
+def _load_brand_stats(path="model/brand_stats.csv"):
+    return _read_brand_stats(path, os.path.getmtime(path))
+
+
+# ----------------------------------------------------------------------
+#               Batch Preprocessor (for Predictions)
+# ----------------------------------------------------------------------
+def preprocess_batch(df: pd.DataFrame):
     """
-    Preprocess a single product record (for prediction).
-    record: dict with keys like title, platform, rating, timestamp, etc.
-    Returns: preprocessed 1-row DataFrame ready for model.predict()
+    Preprocess many product rows at once (for prediction).
+    df: DataFrame with columns like title, platform, rating, timestamp, etc.
+    Returns: preprocessed DataFrame (same index as df) ready for model.predict()
     """
-    import joblib
-    import numpy as np
-    import pandas as pd
-    from datetime import datetime
-
     # --- Load encoders & scalers (fail fast if missing) ---
     enc_path = "model/platform_encoder.pkl"
-    scaler_path = "model/scaler.pkl"
+    scaler_path = "model/scaler.npz"
+    if not os.path.exists(scaler_path) and os.path.exists("model/scaler.pkl"):
+        scaler_path = "model/scaler.pkl"  # models trained before the NumPy scaler
     brand_stats_path = "model/brand_stats.csv"
 
     if not os.path.exists(enc_path):
@@ -137,66 +234,32 @@ def preprocess_single_record(record: dict):
     if not os.path.exists(scaler_path):
         raise FileNotFoundError(f"Missing scaler: {scaler_path}")
 
-    enc = joblib.load(enc_path)
-    scaler_obj = joblib.load(scaler_path)
-    scaler = scaler_obj["scaler"]
-    numeric_cols = scaler_obj["columns"]
+    enc = _load_encoder(enc_path)
+    mean, std, numeric_cols = _load_scaler(scaler_path)
 
-    # --- Convert to DataFrame ---
-    df = pd.DataFrame([record])
-
-    # --- Title & brand ---
-    df["title"] = df.get("title", df.get("name", "")).astype(str)
-    df["brand"] = (
-        df["title"]
-        .str.extract(r"^([A-Za-z0-9]+)", expand=False)
-        .fillna("UNKNOWN")
-        .str.upper()
-    )
-
-    # --- Derived features ---
-    df["rating"] = pd.to_numeric(df.get("rating", 0), errors="coerce").fillna(0)
-    df["timestamp"] = pd.to_datetime(df.get("timestamp", datetime.now()), errors="coerce")
-    df["days_since"] = (datetime.now() - df["timestamp"]).dt.days
-    df["is_ultra"] = df["title"].str.contains("ultra", case=False).astype(int)
-    df["is_fe"] = df["title"].str.contains(r"\bFE\b", case=False).astype(int)
-    df["title_len"] = df["title"].str.len()
-
-    # --- Platform encoding ---
-    df["platform"] = df.get("platform", "Unknown").fillna("Unknown")
-    platform_ohe = enc.transform(df[["platform"]])
-    platform_cols = [f"platform_{c}" for c in enc.categories_[0]]
-    df_platform = pd.DataFrame(platform_ohe, columns=platform_cols, index=df.index)
-    df = pd.concat([df, df_platform], axis=1)
-
-    # Ensure platform columns exist (defensive)
-    for col in platform_cols:
-        if col not in df.columns:
-            df[col] = 0
-
-    # --- Brand-level stats: load saved CSV and merge ---
+    # --- Brand-level stats from the saved CSV ---
     if os.path.exists(brand_stats_path):
-        brand_stats = pd.read_csv(brand_stats_path)
-        # brand_stats should have columns: brand, brand_mean, brand_std
-        if "brand" not in brand_stats.columns:
-            # if saved with index, reset
-            brand_stats = brand_stats.reset_index().rename(columns={brand_stats.columns[0]: "brand"})
-        df = df.merge(brand_stats, on="brand", how="left")
+        brand_stats = _load_brand_stats(brand_stats_path)
         # fallback to global mean if brand missing
-        global_mean = brand_stats["brand_mean"].mean() if "brand_mean" in brand_stats else 0
-        df["brand_mean"].fillna(global_mean, inplace=True)
-        df["brand_std"].fillna(0, inplace=True)
+        global_mean = np.nanmean(list(brand_stats["brand_mean"].values())) if brand_stats["brand_mean"] else 0
     else:
-        # last-resort fallback
-        df["brand_mean"] = 0
-        df["brand_std"] = 0
+        brand_stats, global_mean = None, 0
 
-    # --- Feature selection ---
-    base_features = ["rating", "days_since", "is_ultra", "is_fe", "title_len", "brand_mean", "brand_std"]
-    features = base_features + platform_cols
-    X = df[features].fillna(0)
+    X = _feature_engineer(df, enc, brand_stats, global_mean)
 
     # --- Scale numeric features (use saved scaler) ---
-    X[numeric_cols] = scaler.transform(X[numeric_cols])
+    X[numeric_cols] = (X[numeric_cols].to_numpy(dtype=np.float32) - mean) / std
 
     return X
+
+
+# ----------------------------------------------------------------------
+#               Single Record Preprocessor (for Predictions)
+# ----------------------------------------------------------------------
+def preprocess_single_record(record: dict):
+    """
+    Preprocess a single product record (for prediction).
+    record: dict with keys like title, platform, rating, timestamp, etc.
+    Returns: preprocessed 1-row DataFrame ready for model.predict()
+    """
+    return preprocess_batch(pd.DataFrame([record]))
@@ -6,22 +6,28 @@ import glob
 import pandas as pd
 import numpy as np
 import joblib
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
 
 # 1. IMPORT the correct preprocessing function
 from ml_pipeline.preprocessing import clean_and_feature_engineer
 
+def latest_scrape_file():
+    """Newest scraped_results_* run (CSV or typed Parquet), as its typed Parquet copy when one exists."""
+    files = glob.glob("outputs/scraped_results_*_typed.parquet") + glob.glob("outputs/scraped_results_*.csv")
+    if not files:
+        raise FileNotFoundError("❌ No scraped_results_*_typed.parquet/.csv file found in outputs/ folder.")
+    newest = max(files, key=os.path.getctime)
+    typed = os.path.splitext(newest)[0] + "_typed.parquet"
+    return typed if os.path.exists(typed) else newest
+
+
 def train_and_save():
     """
     Train ML models using the unified preprocessing pipeline.
     """
-    csv_files = glob.glob("outputs/scraped_results_*.csv")
-    if not csv_files:
-        raise FileNotFoundError("❌ No scraped_results_*.csv file found in outputs/ folder.")
-
-    latest_file = max(csv_files, key=os.path.getctime)
+    latest_file = latest_scrape_file()
     print(f"📂 Using latest data file: {latest_file}")
     
     # 2. CALL the unified function
@@ -37,7 +43,8 @@ def train_and_save():
 
     # 3. DEFINE the models
     models = {
-        "rf": RandomForestRegressor(n_estimators=100, random_state=42),
+        "rf": RandomForestRegressor(n_estimators=400, max_depth=12, n_jobs=-1, random_state=42),
+        "hgb": HistGradientBoostingRegressor(max_iter=400, max_depth=12, learning_rate=0.05, random_state=42),
         "lr": LinearRegression()
     }
 
@@ -48,14 +55,15 @@ def train_and_save():
         print("❌ Training data is empty after preprocessing. Cannot train models.")
         return
 
+    # Ensure X_test has the same columns as X_train; cast both once (no implicit float64 upcast)
+    X_test = X_test.reindex(columns=X_train.columns, fill_value=0).astype(np.float32)
+    X_train = X_train.astype(np.float32)
+
     # 4. TRAIN models on the correctly processed data
     for name, model in models.items():
         try:
             model.fit(X_train, y_train)
             
-            # Ensure X_test has the same columns as X_train
-            X_test = X_test.reindex(columns=X_train.columns, fill_value=0)
-            
             preds = model.predict(X_test)
             rmse = np.sqrt(mean_squared_error(y_test, preds))
             r2 = r2_score(y_test, preds)
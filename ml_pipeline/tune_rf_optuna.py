@@ -1,13 +1,89 @@
 # ml_pipeline/tune_rf_optuna.py
+import os
+import argparse
+import multiprocessing as mp
+import numpy as np
 import optuna
-from sklearn.model_selection import cross_val_score
+from optuna.study import MaxTrialsCallback
+from optuna.trial import TrialState
+from sklearn.model_selection import KFold
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
 
-def objective(trial, X, y):
+from ml_pipeline.preprocessing import clean_and_feature_engineer
+from ml_pipeline.train_model import latest_scrape_file
+
+STUDY_NAME = "rf"
+STORAGE = "sqlite:///outputs/optuna.db"  # shared by every worker process
+N_FOLDS = 3
+
+
+def _create_study(storage):
+    # ASHA: trials whose early-fold MAE trails their peers are stopped before the remaining folds
+    return optuna.create_study(
+        study_name=STUDY_NAME, storage=storage, load_if_exists=True, direction="minimize",
+        pruner=optuna.pruners.SuccessiveHalvingPruner(),
+    )
+
+
+def objective(trial, X, y, n_jobs=-1):
     params = {
         "n_estimators": trial.suggest_int("n_estimators", 50, 500),
         "max_depth": trial.suggest_int("max_depth", 3, 30),
         "min_samples_split": trial.suggest_int("min_samples_split", 2, 10)
     }
-    model = RandomForestRegressor(**params, random_state=42, n_jobs=-1)
-    return -cross_val_score(model, X, y, scoring="neg_mean_absolute_error", cv=3).mean()
+    model = RandomForestRegressor(**params, random_state=42, n_jobs=n_jobs)
+
+    X, y = np.asarray(X), np.asarray(y)
+    maes = []
+    for fold, (train_idx, val_idx) in enumerate(KFold(n_splits=N_FOLDS).split(X)):
+        model.fit(X[train_idx], y[train_idx])
+        maes.append(mean_absolute_error(y[val_idx], model.predict(X[val_idx])))
+        trial.report(np.mean(maes), fold)
+        if trial.should_prune():
+            raise optuna.TrialPruned()
+    return np.mean(maes)
+
+
+def run_study(X, y, n_trials=50, storage=STORAGE):
+    """
+    One tuning worker. Every worker attaches to the same RDB-backed study, so
+    running several processes executes trials concurrently; n_trials caps the
+    total number of finished trials across all of them.
+    """
+    study = _create_study(storage)
+    # Trials run in parallel across processes, so each forest stays single-threaded
+    study.optimize(
+        lambda t: objective(t, X, y, n_jobs=1),
+        callbacks=[MaxTrialsCallback(n_trials, states=(TrialState.COMPLETE,))],
+    )
+    return study
+
+
+def launch(n_workers=os.cpu_count(), n_trials=50, storage=STORAGE):
+    """Preprocess once, then fork n_workers run_study processes and wait for them."""
+    latest_file = latest_scrape_file()
+    print(f"📂 Using latest data file: {latest_file}")
+
+    # tune on the training split only; save=False leaves the deployed scaler/brand stats alone
+    X, _, y, _ = clean_and_feature_engineer(latest_file, save=False)
+    # Create the study up front so workers don't race on the schema
+    _create_study(storage)
+
+    workers = [mp.Process(target=run_study, args=(X, y, n_trials, storage)) for _ in range(n_workers)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
+    study = optuna.load_study(study_name=STUDY_NAME, storage=storage)
+    print(f"🏆 Best MAE={study.best_value:.4f} with {study.best_params}")
+    return study
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel Optuna search for the RF price model.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--trials", type=int, default=50)
+    args = parser.parse_args()
+    launch(n_workers=args.workers, n_trials=args.trials)
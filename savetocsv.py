@@ -1,51 +1,140 @@
+import hashlib
+import re
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datetime import datetime
 import os
 from logger import setup_logger  
+from utils import SCRAPED_DATASET, to_numeric_price
 
 logger = setup_logger("save_to_csv")  
 
+URL_HASHES_FILE = "_url_hashes.bin"  # raw int64 digests of every (product, day, price) saved so far
+_ASIN_RE = re.compile(r"/(?:dp|gp/product)/([A-Z0-9]{10})")
+
+
+def _product_key(url):
+    """Stable product identity: Amazon ASIN, Flipkart pid, else the URL without its query string."""
+    parts = urlsplit(url)
+    m = _ASIN_RE.search(parts.path)
+    if m:
+        return "asin:" + m.group(1)
+    pid = parse_qs(parts.query).get("pid")
+    if pid:
+        return "pid:" + pid[0]
+    # qid/sr/iid/ref tracking params change on every search → drop them
+    return parts._replace(query="", fragment="").geturl()
+
+
+def _observation_digest(url, day, price):
+    # 8-byte BLAKE2b → int64: stable across processes (unlike hash()) and cheap to keep in a set
+    key = f"{_product_key(url)}|{day}|{price}"
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+def _drop_seen_urls(df, hashes_path):
+    """
+    Drop repeat observations: the same product at the same price on the same day.
+    A new day or a changed price is a new observation and is kept.
+    Returns (kept rows, new digests); the caller records the digests once its writes succeed.
+    """
+    seen = set(np.fromfile(hashes_path, dtype=np.int64).tolist()) if os.path.exists(hashes_path) else set()
+    keep, new = [], []
+    days = df["timestamp"].astype(str).str.slice(0, 10)
+    for url, day, price in zip(df["url"].astype(str), days, df["price"]):
+        if url == "N/A":  # no URL → nothing to dedup on
+            keep.append(True)
+            continue
+        d = _observation_digest(url, day, price)
+        keep.append(d not in seen)
+        if d not in seen:
+            seen.add(d)
+            new.append(d)
+    return df[keep], new
+
+
+def _record_seen_urls(digests, hashes_path):
+    if digests:
+        with open(hashes_path, "ab") as fh:
+            np.asarray(digests, dtype=np.int64).tofile(fh)
+
 
 def save_scraped_data(data, output_dir="outputs"):
     """
     Purpose:
-    - Unifies data from Amazon & Flipkart scrapers.
+    - Unifies data from Amazon & Flipkart scrapers: either a column batch
+      ({"title": [...], "price": [...], ...}, what the scrapers return) or a
+      list of row dicts.
     - Automatically adds missing columns.
-    - Avoids duplicates by URL.
+    - Skips repeat observations (same product, day and price).
+    - Writes a typed per-run Parquet copy (scraped_results_<ts>_typed.parquet) for training.
+    - Appends the batch to the Parquet history (outputs/scraped.parquet).
     - Returns saved CSV path for downstream analysis.
 
     Columns: title, price, rating, url, platform, timestamp
     """
 
-    if not data:
+    if not data or (isinstance(data, dict) and not any(len(v) for v in data.values())):
         logger.warning("⚠️ No data received — skipping save.")
         return None
 
-    # Normalize and structure incoming data
-    unified = []
-    for item in data:
-        mapped = {
-            "title": item.get("title") or item.get("name") or "N/A",
-            "price": str(item.get("price", "")).strip(),
-            "rating": item.get("rating", ""),
-            "url": item.get("url") or item.get("link") or "N/A",
-            "platform": item.get("platform", "Unknown"),
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        unified.append(mapped)
-
-    df_new = pd.DataFrame(
-        unified, columns=["title", "price", "rating", "url", "platform", "timestamp"]
-    )
+    columns = ["title", "price", "rating", "url", "platform", "timestamp"]
+    scraped_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    # Column batches and lists of row dicts both go straight into one DataFrame;
+    # the "name"/"link" aliases are coalesced column-wise instead of per row
+    raw = pd.DataFrame(data)
+    col = lambda c: raw[c] if c in raw.columns else pd.Series(np.nan, index=raw.index, dtype=object)
 
-    # Prepare output directory and timestamped file name
+    df_new = pd.DataFrame({
+        "title": col("title").fillna(col("name")).fillna("N/A"),
+        "price": col("price").fillna("").astype(str).str.strip(),
+        "rating": col("rating"),
+        "url": col("url").fillna(col("link")).fillna("N/A"),
+        "platform": col("platform").fillna("Unknown"),
+        "timestamp": scraped_at,
+    }, columns=columns)
+
+    # Prepare output directory, then skip listings already recorded today at the same price
     os.makedirs(output_dir, exist_ok=True)
+    before = len(df_new)
+    hashes_path = os.path.join(output_dir, URL_HASHES_FILE)
+    df_new, new_digests = _drop_seen_urls(df_new, hashes_path)
+    if len(df_new) < before:
+        logger.info(f"🔁 Skipped {before - len(df_new)} listings already saved today at the same price.")
+    if df_new.empty:
+        logger.warning("⚠️ Every listing was already saved today at the same price — nothing new to write.")
+        return None
+
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     file_path = os.path.join(output_dir, f"scraped_results_{timestamp}.csv")
 
-    # Save new batch directly (no merging — keeps each run independent)
+    # Save new batch directly (no merging — each run gets its own file)
     df_new.to_csv(file_path, index=False, encoding="utf-8-sig")
 
+    # Typed per-run copy for training: price/rating already numeric and the log1p target
+    # precomputed. The "_typed" suffix keeps it from being mistaken for main_app's CSV sidecar.
+    rating = pd.to_numeric(df_new["rating"], errors="coerce")
+    price = to_numeric_price(df_new["price"])
+    df_new.assign(price=price, log_price=np.log1p(price), rating=rating).to_parquet(
+        os.path.join(output_dir, f"scraped_results_{timestamp}_typed.parquet"), compression="zstd", index=False
+    )
+
+    # Append to the columnar history: one file per run, partitioned by platform
+    table = pa.Table.from_pandas(df_new.assign(rating=rating), preserve_index=False)
+    pq.write_to_dataset(
+        table,
+        root_path=os.path.join(output_dir, os.path.basename(SCRAPED_DATASET)),
+        partition_cols=["platform"],
+        basename_template=f"scraped_{timestamp}_{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+    # Only now that every write landed: a failed save must not mark its URLs as seen
+    _record_seen_urls(new_digests, hashes_path)
+
     # ✅ Logging summary
     logger.info(f"💾 {len(df_new)} records saved to {file_path}")
     logger.debug(f"Last 5 entries:\n{df_new.tail(5).to_string(index=False)}")
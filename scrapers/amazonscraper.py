@@ -1,40 +1,76 @@
 import sys, os
-import requests
-import time
+import io
+import asyncio
+import aiohttp
 import random
 import re
 from urllib.parse import quote_plus, urljoin
-from bs4 import BeautifulSoup
+from lxml import etree
 
 # ---------------------------------------------------------------------
 # 🔧 Ensure logger.py in project root is importable
 # ---------------------------------------------------------------------
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from logger import setup_logger
+from utils import batch_len, empty_batch, extend_batch
+from scrapers.common import UA_LIST, build_session, css_xpath as _xpath
 
 logger = setup_logger("amazon_scraper")
 
 # ---------------------------------------------------------------------
 # --- CONFIGURATION ---
 # ---------------------------------------------------------------------
-UA_LIST = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
-]
+BASE_URL = "https://www.amazon.in"
+MAX_CONNECTIONS = 16   # total sockets in the aiohttp pool
+PER_HOST_LIMIT = 4     # concurrent requests to amazon.in (avoid bans)
+REQUEST_TIMEOUT = 25
+
+_PRICE_NUM_RE = re.compile(r"(\d[\d\.]*)")
+_RATING_RE = re.compile(r"(\d+(?:\.\d+)?)")
 
 # ---------------------------------------------------------------------
 # --- SESSION BUILDER ---
 # ---------------------------------------------------------------------
-def build_session():
-    s = requests.Session()
-    s.headers.update({
-        "User-Agent": random.choice(UA_LIST),
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
-        "Accept-Language": "en-IN,en;q=0.9",
-        "Connection": "keep-alive",
-        "Upgrade-Insecure-Requests": "1",
-    })
-    return s
+def build_async_session():
+    """aiohttp counterpart of build_session(); caller is responsible for closing it."""
+    return aiohttp.ClientSession(
+        headers={
+            "User-Agent": random.choice(UA_LIST),
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+            "Accept-Language": "en-IN,en;q=0.9",
+            "Upgrade-Insecure-Requests": "1",
+        },
+        connector=aiohttp.TCPConnector(limit=MAX_CONNECTIONS, limit_per_host=PER_HOST_LIMIT),
+    )
+
+# Shared by every search_amazon() call: one TLS handshake per host per process
+_SESSION = build_session()
+
+# ---------------------------------------------------------------------
+# --- COMPILED SELECTORS ---
+# CSS -> XPath translation happens once at import; each evaluator runs in C.
+# ---------------------------------------------------------------------
+_XP_TITLE = [_xpath(sel) for sel in (
+    "h2 a span.a-text-normal",
+    "span.a-size-medium.a-color-base.a-text-normal",
+    "span.a-size-base-plus.a-color-base.a-text-normal",
+)]
+_XP_TITLE_IMG = _xpath("img.s-image")
+_XP_PRICE = _xpath("span.a-price > span.a-offscreen")
+_XP_PRICE_ALT = [_xpath("span.a-price-whole"), _xpath("span[class*='price']")]
+_XP_RATING = [_xpath("span[aria-label*='out of 5 stars']"), _xpath("span.a-icon-alt")]
+# Sponsored badge or a popover label reading "Sponsored", answered in one boolean XPath evaluation
+_XP_IS_SPONSORED = etree.XPath(
+    "boolean(.//*[@aria-label='Sponsored']"
+    " | .//span[(contains(concat(' ', normalize-space(@class), ' '), ' s-label-popover-default ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' puis-label-popover-default '))"
+    " and contains(translate(string(.), 'SPONSORED', 'sponsored'), 'sponsored')])"
+)
+_XP_LINK = [_xpath(sel) for sel in (
+    "h2 a.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal",
+    "h2 a.a-link-normal",
+    "a.a-link-normal.s-no-outline",
+)] + [etree.XPath(".//a[contains(@href, '/dp/')]")]
 
 # ---------------------------------------------------------------------
 # --- CLEANERS & EXTRACTORS ---
@@ -43,47 +79,56 @@ def clean_price(text: str):
     if not text:
         return None
     text = text.replace("₹", "").replace(",", "").strip()
-    m = re.search(r"(\d[\d\.]*)", text)
+    m = _PRICE_NUM_RE.search(text)
     return float(m.group(1)) if m else None
 
 
+def _text(el):
+    return "".join(el.itertext())
+
+
+def _first(xpaths, node):
+    for xp in xpaths:
+        els = xp(node)
+        if els:
+            return els[0]
+    return None
+
+
 def extract_title(node):
-    for sel in [
-        "h2 a span.a-text-normal",
-        "span.a-size-medium.a-color-base.a-text-normal",
-        "span.a-size-base-plus.a-color-base.a-text-normal",
-        "img.s-image",
-    ]:
-        el = node.select_one(sel)
-        if el:
-            return el.get("alt") if sel == "img.s-image" else el.get_text(strip=True)
+    el = _first(_XP_TITLE, node)
+    if el is not None:
+        return _text(el).strip()
+    els = _XP_TITLE_IMG(node)
+    if els:
+        return els[0].get("alt")
     return "Unknown Product"
 
 
 def extract_price(node):
     # Try standard selector
-    price_el = node.select_one("span.a-price > span.a-offscreen")
-    if price_el:
-        return clean_price(price_el.get_text())
+    els = _XP_PRICE(node)
+    if els:
+        return clean_price(_text(els[0]))
 
     # Fallback for alternate layouts
-    alt_price = node.select_one("span.a-price-whole") or node.select_one("span[class*='price']")
-    if alt_price:
-        return clean_price(alt_price.get_text())
+    alt_price = _first(_XP_PRICE_ALT, node)
+    if alt_price is not None:
+        return clean_price(_text(alt_price))
 
     return None
 
 
 def extract_rating(node):
-    rating_el = node.select_one("span[aria-label*='out of 5 stars']") or node.select_one("span.a-icon-alt")
-    if not rating_el:
+    rating_el = _first(_XP_RATING, node)
+    if rating_el is None:
         return None
 
-    text = rating_el.get("aria-label", rating_el.get_text())
+    text = rating_el.get("aria-label", _text(rating_el))
     if "star" not in text.lower():
         return None  # skip non-rating text
 
-    m = re.search(r"(\d+(\.\d+)?)", text)
+    m = _RATING_RE.search(text)
     rating = float(m.group(1)) if m else None
     if rating and 0 < rating <= 5:
         return rating
@@ -91,75 +136,156 @@ def extract_rating(node):
 
 
 def is_sponsored(node):
-    if node.select_one("[aria-label='Sponsored']"):
-        return True
-    for lbl in node.select("span.s-label-popover-default, span.puis-label-popover-default"):
-        if "sponsored" in lbl.get_text(strip=True).lower():
-            return True
-    return False
+    return bool(_XP_IS_SPONSORED(node))
+
+
+def extract_url(node):
+    link_el = _first(_XP_LINK, node)
+    href = link_el.get("href") if link_el is not None else None
+    return urljoin(BASE_URL, href) if href else None
+
+# ---------------------------------------------------------------------
+# --- PAGE PARSER (shared by sync + async paths) ---
+# ---------------------------------------------------------------------
+def _in_main_slot(elem):
+    return any("s-main-slot" in (a.get("class") or "").split() for a in elem.iterancestors("div"))
+
+
+def iter_result_nodes(html, encoding=None):
+    """
+    Stream-parse a search page and yield each
+    `div.s-main-slot div[data-component-type='s-search-result'][data-asin]` card
+    as soon as its closing tag is seen. Once the consumer moves on, the card and
+    every sibling before it are dropped, so memory stays at roughly one card.
+    encoding: charset of `html` when it is bytes (the HTTP response charset).
+    """
+    if isinstance(html, str):
+        html, encoding = html.encode("utf-8"), "utf-8"
+    for _, elem in etree.iterparse(io.BytesIO(html), events=("end",), tag="div", html=True, encoding=encoding):
+        if elem.get("data-component-type") != "s-search-result" or elem.get("data-asin") is None:
+            continue
+        if not _in_main_slot(elem):
+            continue
+
+        yield elem
+
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def parse_search_results(html, max_items=15, encoding=None):
+    """Return a column batch ({"title": [...], "price": [...], ...}) of up to max_items products."""
+    if not html or max_items <= 0:
+        return empty_batch()
+
+    # One list per column (extract_price/extract_rating already return floats or None)
+    titles, prices, ratings, urls = [], [], [], []
+    scanned = 0
+    nodes = iter_result_nodes(html, encoding)
+    # cap checked before pulling the next card, so nothing past max_items is parsed or counted
+    while len(titles) < max_items:
+        node = next(nodes, None)
+        if node is None:
+            break
+        scanned += 1
+        if is_sponsored(node):  # cheap check first: skip ads before any extraction
+            continue
+
+        title = extract_title(node)
+        price = extract_price(node)
+        rating = extract_rating(node)
+        product_url = extract_url(node)
+
+        titles.append(" ".join(title.split()) if title else "N/A")
+        prices.append(price)
+        ratings.append(rating)
+        urls.append(product_url)
+
+    logger.info(f"Scanned {scanned} candidate nodes on Amazon.")
+    return {"title": titles, "price": prices, "rating": ratings, "url": urls, "platform": ["Amazon"] * len(titles)}
+
+
+def search_url(keyword, page=1):
+    url = f"{BASE_URL}/s?k={quote_plus(keyword)}"
+    return url if page <= 1 else f"{url}&page={page}"
 
 # ---------------------------------------------------------------------
 # --- MAIN SCRAPER FUNCTION ---
 # ---------------------------------------------------------------------
 def search_amazon(keyword, max_items=15, session=None):
-    session = session or build_session()
-    url = f"https://www.amazon.in/s?k={quote_plus(keyword)}"
+    session = session or _SESSION
+    url = search_url(keyword)
     logger.info(f"Searching Amazon for '{keyword}'...")
 
     try:
-        r = session.get(url, timeout=25)
+        r = session.get(url, timeout=REQUEST_TIMEOUT)
         r.raise_for_status()
     except Exception as e:
         logger.error(f"Request failed: {e}")
-        return []
+        return empty_batch()
 
-    soup = BeautifulSoup(r.text, "lxml")
-    nodes = soup.select("div.s-main-slot div[data-component-type='s-search-result'][data-asin]")
-    logger.info(f"Found {len(nodes)} candidate nodes on Amazon.")
+    # raw bytes for the streaming parser, decoded with the response charset (as r.text would)
+    results = parse_search_results(r.content, max_items, encoding=r.encoding or "utf-8")
+    logger.info(f"✅ Amazon scraper extracted {batch_len(results)} valid products.")
+    return results
 
-    results = []
-    for node in nodes:
-        if is_sponsored(node):
-            continue
+# ---------------------------------------------------------------------
+# --- ASYNC SCRAPER (aiohttp) ---
+# ---------------------------------------------------------------------
+async def _fetch_html(session, url, semaphore):
+    async with semaphore:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)) as r:
+            r.raise_for_status()
+            return await r.read(), r.charset or "utf-8"
 
-        title = extract_title(node)
-        price = extract_price(node)
-        rating = extract_rating(node)
-        link_el = (
-            node.select_one("h2 a.a-link-normal.s-underline-text.s-underline-link-text.s-link-style.a-text-normal")
-            or node.select_one("h2 a.a-link-normal")
-            or node.select_one("a.a-link-normal.s-no-outline")
-            or node.find("a", href=lambda x: x and "/dp/" in x)
-        )
-        product_url = urljoin("https://www.amazon.in", link_el["href"]) if link_el and link_el.has_attr("href") else None
 
-        results.append({
-            "title": title.strip() if title else "N/A",
-            "price": price,
-            "rating": rating,
-            "url": product_url,
-            "platform": "Amazon",
-        })
+async def search_amazon_async(keyword, max_items=15, session=None, pages=1):
+    """
+    Concurrent version of search_amazon().
+    All `pages` result pages are requested at once; at most PER_HOST_LIMIT
+    are in flight against amazon.in at any time.
+    """
+    owns_session = session is None
+    session = session or build_async_session()
+    semaphore = asyncio.Semaphore(PER_HOST_LIMIT)
+    logger.info(f"Searching Amazon for '{keyword}' ({pages} page(s))...")
+
+    try:
+        pages_html = await asyncio.gather(
+            *(_fetch_html(session, search_url(keyword, p), semaphore) for p in range(1, pages + 1)),
+            return_exceptions=True,
+        )
+    finally:
+        if owns_session:
+            await session.close()
 
-        if len(results) >= max_items:
+    results = empty_batch()
+    for page in pages_html:
+        if isinstance(page, Exception):
+            logger.error(f"Request failed: {page}")
+            continue
+        html, encoding = page
+        extend_batch(results, parse_search_results(html, max_items - batch_len(results), encoding))
+        if batch_len(results) >= max_items:
             break
 
-    # Post-cleaning
-    for r in results:
-        if isinstance(r["title"], str):
-            r["title"] = " ".join(r["title"].split())
-        if isinstance(r["price"], str):
-            r["price"] = clean_price(r["price"])
-        if isinstance(r["rating"], str):
-            try:
-                r["rating"] = float(r["rating"])
-            except:
-                r["rating"] = None
-
-    logger.info(f"✅ Amazon scraper extracted {len(results)} valid products.")
+    logger.info(f"✅ Amazon scraper extracted {batch_len(results)} valid products.")
     return results
 
 
+async def search_many(keywords, max_items=15, pages=1):
+    """
+    Search several keywords concurrently over one pooled session.
+    Returns one column batch per keyword, in the same order (a failed search is an empty batch).
+    """
+    async with build_async_session() as session:
+        return await asyncio.gather(
+            *(search_amazon_async(k, max_items=max_items, session=session, pages=pages) for k in keywords)
+        )
+
+
 # ---------------------------------------------------------------------
 # --- MAIN EXECUTION (for direct run or Streamlit subprocess) ---
 # ---------------------------------------------------------------------
@@ -167,7 +293,7 @@ if __name__ == "__main__":
     keyword = os.getenv("SCRAPE_KEYWORD", "iPhone 16")
     results = search_amazon(keyword, max_items=15)
 
-    if results:
+    if batch_len(results):
         import pandas as pd
         os.makedirs("outputs", exist_ok=True)
         out_path = os.path.join("outputs", f"scraped_results_amazon_{keyword.replace(' ', '_')}.csv")
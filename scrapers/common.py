@@ -0,0 +1,52 @@
+# ---------------------------------------------------------------------
+# Helpers shared by amazonscraper.py and flipkartscraper.py:
+# browser-like User-Agents, the pooled requests session and the
+# memoized CSS -> XPath compiler.
+# ---------------------------------------------------------------------
+import random
+from functools import lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+from lxml import etree
+from cssselect import GenericTranslator
+
+UA_LIST = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
+]
+
+
+def build_session():
+    s = requests.Session()
+    s.headers.update({
+        "User-Agent": random.choice(UA_LIST),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-IN,en;q=0.9",
+        # gzip/deflate (+ br/zstd when the decoders are installed); requests decodes transparently
+        "Accept-Encoding": make_headers(accept_encoding=True)["accept-encoding"],
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+    })
+    # Pooled keep-alive connections + retry on throttling
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 503]),
+    )
+    s.mount("https://", adapter)
+    return s
+
+
+# CSS -> XPath translation happens once per selector; each evaluator runs in C.
+_CSS = GenericTranslator()
+
+
+@lru_cache(maxsize=256)
+def css_xpath(css):
+    """
+    Compile a CSS selector into an XPath evaluator that searches below the given node.
+    Memoized, so a selector string is only ever translated/compiled once per process.
+    """
+    return etree.XPath(_CSS.css_to_xpath(css, prefix="descendant::"))
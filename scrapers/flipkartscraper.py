@@ -1,35 +1,110 @@
 import sys, os
-import time
+import atexit
+import asyncio
+import threading
+import requests
+from functools import lru_cache
+from urllib.parse import quote_plus
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 
 # ---------------------------------------------------------------------
 # 🔧 Ensure logger.py in project root is importable
 # ---------------------------------------------------------------------
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from logger import setup_logger
+from utils import batch_len, empty_batch
+from scrapers.common import build_session, css_xpath as _xpath
 
 logger = setup_logger("flipkart_scraper")
 
 # ---------------------------------------------------------------------
-# --- MAIN SCRAPER FUNCTION ---
+# --- CONFIGURATION ---
 # ---------------------------------------------------------------------
-def scrape_flipkart_prices(product_name):
-    logger.info(f"Searching Flipkart for '{product_name}'...")
+BASE_URL = "https://www.flipkart.com"
+REQUEST_TIMEOUT = 25
+
+# Plain HTTP path (shared session builder); the browser is only a fallback
+_SESSION = build_session()
+
+# ---------------------------------------------------------------------
+# --- COMPILED SELECTORS ---
+# ---------------------------------------------------------------------
+# Card layouts in order of preference (Flipkart rotates class names)
+_XP_CARDS = [_xpath("div.tUxRFH"), _xpath("div._75nlfW"), _xpath("div._1AtVbE")]
+_XP_TITLE = _xpath("a.IRpwTa, a.s1Q9rs, div.KzDlHZ, a.WKTcLC, div._4rR01T")
+_XP_PRICE = _xpath("div.Nx9bqj._4b5DiR, div._30jeq3")
+_XP_RATING = _xpath("div.XQDdHH, div._3LWZlK")
+_XP_LINK = etree.XPath(".//a[contains(@href, '/p/')]")
+
+
+def _text(xp, node):
+    els = xp(node)
+    return els[0].text_content().strip() if els else "N/A"
+
+# ---------------------------------------------------------------------
+# --- SHARED BROWSER ---
+# One headless Chrome per process, started lazily and reused across calls.
+# ---------------------------------------------------------------------
+RESULTS_WAIT_SECONDS = 10
+RESULTS_CSS = "div.tUxRFH, div._75nlfW, div._1AtVbE"
 
+_driver = None
+_driver_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _chromedriver_path():
+    """
+    Pinned binary from $CHROMEDRIVER if set, otherwise webdriver_manager's lookup —
+    resolved on first use and then reused for the rest of the process.
+    """
+    return os.environ.get("CHROMEDRIVER") or ChromeDriverManager().install()
+
+
+def _chrome_options():
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
     chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    chrome_options.page_load_strategy = "eager"  # return at DOMContentLoaded
+    return chrome_options
+
+
+def _get_driver():
+    global _driver
+    if _driver is None:
+        _driver = webdriver.Chrome(service=Service(_chromedriver_path()), options=_chrome_options())
+    return _driver
 
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    driver.get("https://www.flipkart.com")
+
+def _quit_driver():
+    global _driver
+    if _driver is not None:
+        try:
+            _driver.quit()
+        except Exception:
+            pass
+        _driver = None
+
+
+atexit.register(_quit_driver)
+
+
+def _search_page_source(driver, product_name):
+    driver.get(BASE_URL)
 
     # Close login popup if it appears
     try:
@@ -42,41 +117,92 @@ def scrape_flipkart_prices(product_name):
     search_box = driver.find_element(By.NAME, "q")
     search_box.send_keys(product_name)
     search_box.send_keys(Keys.RETURN)
-    time.sleep(5)
 
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    product_cards = (
-        soup.select("div.tUxRFH")
-        or soup.select("div._75nlfW")
-        or soup.select("div._1AtVbE")
-    )
+    # Wait only as long as it takes for the first product card to render
+    try:
+        WebDriverWait(driver, RESULTS_WAIT_SECONDS).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, RESULTS_CSS))
+        )
+    except TimeoutException:
+        logger.warning(f"⚠️ No product cards after {RESULTS_WAIT_SECONDS}s — parsing whatever loaded.")
+
+    return driver.page_source
+
+def _find_cards(page_source, encoding=None):
+    # encoding: charset of page_source when it is bytes (the HTTP response charset)
+    if not page_source or not page_source.strip():
+        return []  # empty body → no cards, let the caller fall back to the browser
+    parser = lxml.html.HTMLParser(encoding=encoding) if encoding else None
+    try:
+        tree = lxml.html.fromstring(page_source, parser=parser)
+    except etree.ParserError:
+        return []
+    return next((cards for cards in (xp(tree) for xp in _XP_CARDS) if cards), [])
+
+
+def _search_static(product_name):
+    """Product cards from a plain GET of the search page ([] if blocked or not server-rendered)."""
+    try:
+        r = _SESSION.get(f"{BASE_URL}/search?q={quote_plus(product_name)}", timeout=REQUEST_TIMEOUT)
+        r.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"⚠️ Static Flipkart request failed: {e}")
+        return []
+    return _find_cards(r.content, encoding=r.encoding or "utf-8")
+
+
+def _search_browser(product_name):
+    # The browser is shared, so only one search drives it at a time
+    with _driver_lock:
+        try:
+            page_source = _search_page_source(_get_driver(), product_name)
+        except WebDriverException:
+            _quit_driver()  # start from a fresh browser next time
+            raise
+    return _find_cards(page_source)
+
+# ---------------------------------------------------------------------
+# --- MAIN SCRAPER FUNCTION ---
+# ---------------------------------------------------------------------
+def scrape_flipkart_prices(product_name):
+    logger.info(f"Searching Flipkart for '{product_name}'...")
+
+    product_cards = _search_static(product_name)
+    if not product_cards:
+        logger.info("No cards in the static HTML (anti-bot page?) — falling back to headless Chrome.")
+        product_cards = _search_browser(product_name)
 
     if not product_cards:
         logger.warning("⚠️ No products found — Flipkart layout may have changed.")
-        driver.quit()
-        return []
+        return empty_batch()
+
+    # Column batch: one list per field, filled card by card
+    cards = product_cards[:10]
+    urls = []
+    for card in cards:
+        link_tags = _XP_LINK(card)
+        urls.append(f"{BASE_URL}{link_tags[0].get('href')}" if link_tags else "N/A")
+
+    results = {
+        "title": [_text(_XP_TITLE, card) for card in cards],
+        "price": [_text(_XP_PRICE, card) for card in cards],
+        "rating": [_text(_XP_RATING, card) for card in cards],
+        "url": urls,
+        "platform": ["Flipkart"] * len(cards),
+    }
 
-    results = []
-    for card in product_cards[:10]:
-        title_el = card.select_one("a.IRpwTa, a.s1Q9rs, div.KzDlHZ, a.WKTcLC, div._4rR01T")
-        price_el = card.select_one("div.Nx9bqj._4b5DiR, div._30jeq3")
-        rating_el = card.select_one("div.XQDdHH, div._3LWZlK")
-        link_tag = card.find("a", href=lambda x: x and "/p/" in x)
-        link = f"https://www.flipkart.com{link_tag['href']}" if link_tag else "N/A"
-
-        results.append({
-            "title": title_el.text.strip() if title_el else "N/A",
-            "price": price_el.text.strip() if price_el else "N/A",
-            "rating": rating_el.text.strip() if rating_el else "N/A",
-            "url": link,
-            "platform": "Flipkart"
-        })
-
-    driver.quit()
-    logger.info(f"✅ Flipkart scraper extracted {len(results)} valid products.")
+    logger.info(f"✅ Flipkart scraper extracted {batch_len(results)} valid products.")
     return results
 
 
+async def scrape_flipkart_async(product_name):
+    """
+    Awaitable wrapper so Flipkart can be gathered alongside the aiohttp Amazon scraper.
+    The requests path and the Selenium fallback both block, so the search runs in a worker thread.
+    """
+    return await asyncio.to_thread(scrape_flipkart_prices, product_name)
+
+
 # ---------------------------------------------------------------------
 # --- MAIN EXECUTION (for direct run or Streamlit subprocess) ---
 # ---------------------------------------------------------------------
@@ -84,7 +210,7 @@ if __name__ == "__main__":
     keyword = os.getenv("SCRAPE_KEYWORD", "iPhone 16")
     results = scrape_flipkart_prices(keyword)
 
-    if results:
+    if batch_len(results):
         import pandas as pd
         os.makedirs("outputs", exist_ok=True)
         out_path = os.path.join("outputs", f"scraped_results_flipkart_{keyword.replace(' ', '_')}.csv")
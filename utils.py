@@ -0,0 +1,70 @@
+# utils.py
+import os
+import re
+import pandas as pd
+
+# Columns every scraper writes, with the dtypes we want on load
+SCRAPED_COLUMNS = ["title", "platform", "price", "rating", "url"]
+SCRAPED_DTYPES = {"title": "string", "platform": "string", "price": "string", "rating": "float32", "url": "string"}
+
+# Append-only Parquet history written by save_scraped_data (partitioned by platform)
+SCRAPED_DATASET = os.path.join("outputs", "scraped.parquet")
+
+# Compiled once; reused by every price-cleaning call site
+_PRICE_STRIP_RE = re.compile(r"[₹,\s]")
+_PRICE_NUM_RE = re.compile(r"(\d+\.?\d*)")
+
+
+def to_numeric_price(series):
+    """
+    Convert a scraped price column ("₹80,999", "80999.0", "N/A", ...) to floats.
+    Currency sign, thousands separators and whitespace are stripped in a single
+    pass, then the first number is extracted; anything else becomes NaN.
+    Columns that are already numeric skip the string round-trip entirely.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype("float64")
+    s = series.astype(str).str.replace(_PRICE_STRIP_RE, "", regex=True)
+    return pd.to_numeric(s.str.extract(_PRICE_NUM_RE, expand=False), errors="coerce")
+
+
+def read_scraped_csv(path, columns=SCRAPED_COLUMNS):
+    """
+    Load only `columns` of a scraped-results CSV with the multithreaded
+    PyArrow reader and fixed dtypes (no per-column type inference).
+    """
+    dtypes = {c: SCRAPED_DTYPES[c] for c in columns if c in SCRAPED_DTYPES}
+    return pd.read_csv(path, engine="pyarrow", usecols=list(columns), dtype=dtypes)
+
+
+# ---------------------------------------------------------------------
+# Scraper batches are column-oriented: {"title": [...], "price": [...], ...}
+# (same layout pandas uses, so pd.DataFrame(batch) needs no transpose)
+# ---------------------------------------------------------------------
+def empty_batch():
+    return {c: [] for c in SCRAPED_COLUMNS}
+
+
+def batch_len(batch):
+    return len(batch["title"]) if batch else 0
+
+
+def extend_batch(batch, other):
+    """Append `other`'s rows to `batch` in place (no new lists)."""
+    for c in SCRAPED_COLUMNS:
+        batch[c].extend(other.get(c, ()))
+    return batch
+
+
+def concat_batches(*batches):
+    out = empty_batch()
+    for batch in batches:
+        extend_batch(out, batch)
+    return out
+
+
+def read_scraped(path, columns=SCRAPED_COLUMNS):
+    """Load scraped results from either a Parquet file/dataset or a CSV, reading only `columns`."""
+    if path.endswith(".parquet") or os.path.isdir(path):
+        return pd.read_parquet(path, columns=list(columns))
+    return read_scraped_csv(path, columns)